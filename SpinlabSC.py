@@ -17,8 +17,48 @@ Description:    SpinlabSC is a multi-platform library that exposes an interface
 """
 
 # Required modules
+import numpy as np
 import mysql.connector
 from mysql.connector import errorcode
+from mysql.connector import pooling
+from mysql.connector.constants import ClientFlag
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import asyncio
+import csv
+import functools
+import threading
+import time
+
+# Use the C extension for the connection when it was built with the connector
+try:
+    from mysql.connector import HAVE_CEXT
+except ImportError:
+    HAVE_CEXT = False
+
+# Optional modules
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:
+    pa = None
 
 # Custom exceptions
 class DatabaseException(Exception):
@@ -29,46 +69,215 @@ class ModelException(Exception):
 
 # Useful 'Macros'
 def EQ(val):
-    return {'comp':'=','val':str(val)}
+    return {'comp':'=','val':val}
 
 def NEQ(val):
-    return {'comp':'!=','val':str(val)}
+    return {'comp':'!=','val':val}
 
 def LT(val):
-    return {'comp':'<','val':str(val)}
+    return {'comp':'<','val':val}
 
 def LE(val):
-    return {'comp':'<=','val':str(val)}
+    return {'comp':'<=','val':val}
 
 def GT(val):
-    return {'comp':'>','val':str(val)}
+    return {'comp':'>','val':val}
 
 def GE(val):
-    return {'comp':'>=','val':str(val)}
+    return {'comp':'>=','val':val}
 
 def InRange(low,high):
-    return {'comp':'BETWEEN','val':' '.join([str(low),'AND',str(high)])}
+    return {'comp':'BETWEEN','val':(low,high)}
+
+def In(vals):
+    vals = tuple(vals)
+    if not vals:
+        print('IN requires at least one value')
+        raise DatabaseException('Empty IN list')
+    return {'comp':'IN','val':vals}
 
 def Enquote(string):
-    return '\'' + string + '\''
+    # Values are now bound by the driver, so a quoted literal passed to the
+    # macros above would be matched as-is and find nothing
+    print('Enquote is no longer needed, pass the value to the macro directly')
+    raise DatabaseException('Enquote removed, values are bound by the driver')
 
 def Sep(*args):
     return '.'.join(args)
 
 def EnDate(date):
-    return 'TIMESTAMP(' + Enquote(str(date)) + ')'
+    print('EnDate is no longer needed, pass the datetime to the macro directly')
+    raise DatabaseException('EnDate removed, values are bound by the driver')
+
+@functools.lru_cache(maxsize=512)
+def _InsertSQL(table,columns):
+    """Form the INSERT query string for a table and set of columns
+    Parameters:
+        table - string, name of the table to insert into
+        columns - string tuple, names of the columns being filled"""
+    return " ".join(("INSERT INTO",table,"(",",".join(columns),")",
+                     "VALUES (",",".join(['%s']*len(columns)),")"))
+
+def _Param(val):
+    """Convert a value to a type the driver can bind.  NumPy scalars, such as
+    the IDs and times taken from a RecordSet, become the Python equivalent.
+    Parameters:
+        val - value to bind"""
+    if isinstance(val,np.datetime64):
+        # Cast first, at nanosecond precision item() would give an int
+        return val.astype('datetime64[us]').item()
+    if isinstance(val,np.generic):
+        return val.item()
+    return val
+
+def _InsertQuery(table,pairs):
+    """Form an INSERT query string and its parameters
+    Parameters:
+        table - string, name of the table to insert into
+        pairs - dictionary of column/value pairs, values are bound by the driver"""
+    return _InsertSQL(table,tuple(pairs)),tuple(_Param(v) for v in pairs.values())
+
+@functools.lru_cache(maxsize=512)
+def _SelectSQL(table,columns,order,conds):
+    """Form the SELECT query string for a statement shape
+    Parameters:
+        table - string, name of the table to query
+        columns - string tuple, names of columns to select, all if empty
+        order - string, ORDER BY clause, optional
+        conds - tuple of (column, comparison, number of values) triples"""
+    # Determine if any columns are requested
+    cols = ",".join(columns) if columns else '*'
+
+    # Build the base query
+    query = " ".join(["SELECT",cols,"FROM",table])
+
+    # Add on any conditions
+    if conds:
+        options = []
+        for k,comp,n in conds:
+            if comp == 'BETWEEN':
+                options.append(" ".join([k,'BETWEEN %s AND %s']))
+            elif comp == 'IN':
+                options.append(k + ' IN (' + ','.join(['%s']*n) + ')')
+            else:
+                options.append(" ".join([k,comp,'%s']))
+        query += " WHERE " + " AND ".join(options)
+
+    # Optional ordering
+    if order:
+        query += ' ORDER BY ' + order
+
+    return query
+
+def _SelectQuery(table,columns,order,conds):
+    """Form a SELECT query string and its parameters
+    Parameters:
+        table - string, name of the table to query
+        columns - string list, names of columns to select, all if empty
+        order - string, ORDER BY clause, optional
+        conds - dictionary of conditions built with the macros above"""
+    # Only the shape of the conditions goes into the query string, the
+    # values are bound by the driver
+    shape = []
+    params = []
+    for k,v in conds.items():
+        comp,val = v['comp'],v['val']
+        if comp == 'BETWEEN':
+            n = 2
+            params.extend(val)
+        elif comp == 'IN':
+            # Pad the list to a power of two by repeating the last value,
+            # so only a few distinct statements ever get prepared
+            n = 1 << (len(val)-1).bit_length()
+            params.extend(val + val[-1:]*(n-len(val)))
+        else:
+            n = 1
+            params.append(val)
+        shape.append((k,comp,n))
+
+    return _SelectSQL(table,tuple(columns),order,tuple(shape)),tuple(_Param(v) for v in params)
+
+# Record timestamps are sent as microseconds since the epoch, a BIGINT that
+# maps directly onto datetime64[us], rather than as DATETIME values.  The
+# difference is taken on the session's wall clock, like the DTGs read directly.
+_EpochDTG = "TIMESTAMPDIFF(MICROSECOND,'1970-01-01',recDTG)"
+
+@functools.lru_cache(maxsize=None)
+def _LatestSQL(table,n):
+    """Form the query for the most recent record of each of n sensors.  The
+    innermost table is answered from the (senID,recDTG) index with one seek
+    per sensor.  A whole RecordMeasurements batch shares its DTG, so ties on
+    it go to the highest recID, which that index also holds.  The JOIN back
+    then picks up the rest of one row per sensor.
+    Parameters:
+        table - string, name of the records table
+        n - int, number of sensor IDs in the IN list"""
+    return " ".join(("SELECT r.senID,r.recData,r.recError,r.recDTG,r.recID FROM",table,"r",
+                     "JOIN (SELECT t.senID,MAX(t.recID) AS latestID FROM",table,"t",
+                     "JOIN (SELECT senID,MAX(recDTG) AS latest FROM",table,
+                     "WHERE senID IN (" + ",".join(['%s']*n) + ") GROUP BY senID) x",
+                     "ON t.senID = x.senID AND t.recDTG = x.latest GROUP BY t.senID) y",
+                     "ON r.recID = y.latestID"))
+
+# Levels of a nomenclature: table, alias, columns pulled, name column and ID
+# column.  Each level references its parent through the parent's ID column.
+_PathLevels = (('Owners','o',('ownerName','ownerDesc','ownerID','ownerDTG'),'ownerName','ownerID'),
+               ('Projects','p',('projName','projDesc','projID','projDTG'),'projName','projID'),
+               ('Systems','s',('sysName','sysDesc','sysID','sysDTG'),'sysName','sysID'),
+               ('Devices','d',('devName','devDesc','devURL','mfgID','devID','devDTG'),'devName','devID'))
+
+@functools.lru_cache(maxsize=None)
+def _PathSQL(depth):
+    """Form the query that resolves the first depth levels of a nomenclature
+    with a single pass down the JOINed tables
+    Parameters:
+        depth - int, number of levels, 2 (project) through 4 (device)"""
+    levels = _PathLevels[:depth]
+    cols = ",".join(alias + '.' + col for table,alias,columns,nameCol,idCol in levels
+                                      for col in columns)
+    query = " ".join(("SELECT",cols,"FROM",levels[0][0],levels[0][1]))
+    for parent,child in zip(levels,levels[1:]):
+        query += " " + " ".join(("JOIN",child[0],child[1],"ON",
+                                 child[1] + '.' + parent[4],"=",parent[1] + '.' + parent[4]))
+    query += " WHERE " + " AND ".join(alias + '.' + nameCol + ' = %s'
+                                      for table,alias,columns,nameCol,idCol in levels)
+    return query
 
 class Database(object):
     """Encapsulates a MySQL database connection"""  
 
-    def __init__(self,host,dbname,user,pw,devmode=False):
+    # Maximum number of rows sent in a single multi-row INSERT
+    batchSize = 500
+
+    # Seconds a reading of the server's clock is used to stamp new rows
+    clockInterval = 60
+
+    # Unique keys that the create methods rely on to reject duplicate entries
+    uniqueKeys = {'Owners' : ('uqOwnerName',('ownerName',)),
+                  'Projects' : ('uqProjName',('ownerID','projName')),
+                  'Systems' : ('uqSysName',('projID','sysName')),
+                  'Manufacturers' : ('uqMfgName',('mfgName',)),
+                  'Devices' : ('uqDevName',('sysID','devName')),
+                  'Units' : ('uqUnitLong',('unitLong',)),
+                  'Sensors' : ('uqSenName',('devID','senName'))}
+
+    # Plain indexes that the record queries are written against
+    indexes = {'Records' : ('idxSenDTG',('senID','recDTG')),
+               'playground' : ('idxSenDTG',('senID','recDTG'))}
+
+    # Slowly changing reference tables that are held entirely in memory,
+    # along with the attribute their objects are also looked up by
+    refTables = {'Owners':'name','Manufacturers':'name','Units':'long'}
+
+    def __init__(self,host,dbname,user,pw,devmode=False,poolSize=5):
 
         """Initializes the database connection
         Parameters:
             host - string, URL of the DB server
             dbname - string, name of the schema to connect to
             user - string, user name for login
-            pw - string, password associated with provided user name"""
+            pw - string, password associated with provided user name
+            poolSize - int, number of connections shared between callers"""
 
         # Make sure that the input arguments are filled
         if "" in (host,dbname,user,pw):
@@ -78,7 +287,10 @@ class Database(object):
         config = { 'user' : user,
                    'password' : pw,
                    'host' : host,
-                   'database' : dbname }
+                   'database' : dbname,
+                   'use_pure' : not HAVE_CEXT,
+                   'compress' : True,
+                   'client_flags' : [ClientFlag.FOUND_ROWS] }
 
         
         self.devmode = devmode
@@ -91,10 +303,38 @@ class Database(object):
 
             
 
-        # Attempt the connection
-        try:
-            self.conn = mysql.connector.connect(**config)
+        # Cursors kept open for reuse, one cache per pooled connection holding
+        # the session the cursors belong to and the cursors keyed by SQL text
+        # and whether they are prepared. Only the thread holding a connection
+        # touches its cursors, the lock just keeps the dictionary consistent
+        # while Close() empties it
+        self._stmtCache = {}
+        self._stmtLock = threading.Lock()
 
+        # Tables whose unique key is in the schema, read on the first create
+        self._keyedTables = None
+
+        # The server's time paired with this process's monotonic clock when
+        # it was read, and the fractional digits each DTG column stores
+        self._serverClock = None
+        self._dtgPrecision = None
+
+        # Model objects already pulled from the DB, keyed by table then ID
+        self._idCache = {table:{} for table in ('Owners','Projects','Systems',
+                                               'Manufacturers','Devices','Units')}
+
+        # Reference table objects keyed by name, and which tables are loaded
+        self._nameCache = {table:{} for table in self.refTables}
+        self._refLoaded = set()
+
+        # Callers wait here for a free connection rather than erroring out
+        self._poolSlots = threading.BoundedSemaphore(poolSize)
+
+        # Attempt the connection, sessions are not reset when a connection is
+        # returned so that its prepared statements stay valid
+        try:
+            self.pool = pooling.MySQLConnectionPool(pool_name='spinlab',pool_size=poolSize,
+                                                    pool_reset_session=False,**config)
 
         except mysql.connector.Error as e:
             # Authentication failed
@@ -106,31 +346,241 @@ class Database(object):
                 print("Schema",dbname,"does not exist")
 
     def Close(self):
-        """Close the database connection"""
-        self.conn.close()
+        """Close all of the pooled database connections"""
+        with self._stmtLock:
+            cursors = [cursor for session,stmts in self._stmtCache.values()
+                              for cursor in stmts.values()]
+            self._stmtCache.clear()
+
+        for cursor in cursors:
+            cursor.close()
+        self.pool._remove_connections()
+
+    def ClearCache(self):
+        """Forget all model objects cached from earlier lookups"""
+        for cache in self._idCache.values():
+            cache.clear()
+        for cache in self._nameCache.values():
+            cache.clear()
+        self._refLoaded.clear()
+
+    def Refresh(self):
+        """Drop all cached objects and reload the reference tables"""
+        self.ClearCache()
+        for table in self.refTables:
+            self._LoadReference(table)
+
+    def _LoadReference(self,table):
+        """Pull a whole reference table into the cache the first time it is used
+        Parameters:
+            table - string, one of the reference tables"""
+        if table in self._refLoaded:
+            return
+
+        if table == 'Owners':
+            self.GetOwners()
+        elif table == 'Manufacturers':
+            self.GetManufacturers()
+        else:
+            self.GetAllUnits()
+        self._refLoaded.add(table)
+
+    def _Remember(self,table,obj):
+        """Cache a model object for later lookups by ID and hand it back
+        Parameters:
+            table - string, name of the table the object came from
+            obj - model object with a DB ID"""
+        self._idCache[table][obj.ID] = obj
+        if table in self._nameCache:
+            self._nameCache[table][getattr(obj,self.refTables[table])] = obj
+        return obj
+
+    @contextmanager
+    def _Connection(self):
+        """Borrow a connection from the pool for the duration of a with block"""
+        with self._poolSlots:
+            conn = self.pool.get_connection()
+            try:
+                yield conn
+            finally:
+                # Sessions are not reset on return to the pool, so end any open
+                # transaction here.  Otherwise a connection that only read would
+                # keep its REPEATABLE READ snapshot, and never see rows that
+                # were committed through the other pooled connections since.
+                try:
+                    conn.rollback()
+                finally:
+                    # Hands the connection back to the pool
+                    conn.close()
+
+    def _Statement(self,conn,query,prepared=True):
+        """Obtain the cursor for a query, creating it on first use
+        Parameters:
+            conn - connection borrowed from the pool
+            query - string, SQL with %s placeholders for the values
+            prepared - bool, whether the statement is prepared on the server"""
+        # The pool hands out a new wrapper on every borrow, but the connection
+        # under it persists.  Session IDs alone are not enough to tell the
+        # connections apart, as the server reuses them after a restart.
+        cnx = conn._cnx
+        session = conn.connection_id
+        entry = self._stmtCache.get(cnx)
+        if entry is None or entry[0] != session:
+            # New, or reconnected, in which case the cursors of the old session
+            # went with it
+            entry = (session,{})
+            with self._stmtLock:
+                self._stmtCache[cnx] = entry
+
+        stmts = entry[1]
+        key = (query,prepared)
+        cursor = stmts.get(key)
+        if cursor is None:
+            cursor = conn.cursor(prepared=prepared)
+            stmts[key] = cursor
+
+        return cursor
 
     def Insert(self,table,**kwargs):
         """Execute an INSERT MySQL command.
         Pass in a dictionary of key/value pairs to insert."""
-        # Make sure all values are formatted as strings
-        pairs = {k:str(v) for k,v in kwargs.items()}
-
-        # Form the query string
-        query = " ".join(("INSERT INTO",table,"(",",".join(pairs.keys()),")","VALUES (",",".join(pairs.values()),")"))
+        query,params = _InsertQuery(table,kwargs)
 
         if self.devmode:
-            print(query)
+            print(query,params)
 
         # Execute this command
-        cursor = self.conn.cursor()
-        cursor.execute(query)
-        lastID = cursor.getlastrowid()
-        cursor.close()
+        with self._Connection() as conn:
+            cursor = self._Statement(conn,query)
+            cursor.execute(query,params)
+            lastID = cursor.lastrowid
 
-        self.conn.commit()
+            conn.commit()
 
         return lastID
 
+    def _InsertNew(self,table,label,name,**kwargs):
+        """Execute an INSERT for a new entry, letting the table's unique key
+        reject duplicates instead of looking the entry up beforehand
+        Parameters:
+            table - string, name of the table to insert into
+            label - string, kind of entry, used in the error message
+            name - string, name of the entry, used in the error message
+            kwargs - key/value pairs to insert"""
+        # Without the unique key the DB would accept the duplicate, so fall
+        # back to looking the entry up first, as was done before the keys
+        if table not in self._KeyedTables():
+            index,columns = self.uniqueKeys[table]
+            if self.Select(table,[columns[0]],**{col:EQ(kwargs[col]) for col in columns}):
+                print(label,name,'already exists')
+                raise DatabaseException(label + ' already exists')
+            return self.Insert(table,**kwargs)
+
+        try:
+            return self.Insert(table,**kwargs)
+        except mysql.connector.IntegrityError as e:
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                raise
+            print(label,name,'already exists')
+            raise DatabaseException(label + ' already exists')
+
+    def _Now(self,table,column):
+        """The server's current time, for stamping a new row client side so
+        it need not be read back.  The time is cut to the precision of the
+        column, so the DTG handed back is exactly the one the DB stores.
+        Parameters:
+            table - string, name of the table being inserted into
+            column - string, name of its DTG column"""
+        # Time elapsed here is measured on the monotonic clock, which neither
+        # DST changes nor NTP steps move.  The server's time is read again
+        # once it is older than clockInterval, so its own changes follow.
+        if self._serverClock is None or time.monotonic() - self._serverClock[1] > self.clockInterval:
+            with self._Connection() as conn:
+                cursor = conn.cursor()
+                if self._dtgPrecision is None:
+                    cursor.execute("SELECT TABLE_NAME,COLUMN_NAME,DATETIME_PRECISION "
+                                   "FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+                                   "AND COLUMN_NAME LIKE '%DTG'")
+                    self._dtgPrecision = {(t,c):int(p or 0) for t,c,p in cursor.fetchall()}
+
+                # Stamps follow the server's clock and time zone, as NOW() did
+                cursor.execute("SELECT NOW(6)")
+                self._serverClock = (cursor.fetchall()[0][0],time.monotonic())
+                cursor.close()
+
+        serverNow,then = self._serverClock
+        now = serverNow + timedelta(seconds=time.monotonic() - then)
+        step = 10**(6 - self._dtgPrecision.get((table,column),0))
+        return now.replace(microsecond=now.microsecond - now.microsecond % step)
+
+    def _SchemaIndexes(self,cursor):
+        """Collect the columns of every index already in the schema, keyed by
+        table, index name and whether the index allows duplicates
+        Parameters:
+            cursor - cursor to run the information_schema query on"""
+        cursor.execute("SELECT TABLE_NAME,INDEX_NAME,NON_UNIQUE,COLUMN_NAME "
+                       "FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                       "ORDER BY TABLE_NAME,INDEX_NAME,SEQ_IN_INDEX")
+        found = {}
+        for table,index,nonUnique,column in cursor.fetchall():
+            found.setdefault((table,index,int(nonUnique)),[]).append(column)
+        return found
+
+    def _KeyedTables(self):
+        """The tables whose unique key from uniqueKeys is in the schema, read
+        from the DB the first time it is needed"""
+        if self._keyedTables is None:
+            with self._Connection() as conn:
+                cursor = conn.cursor()
+                found = self._SchemaIndexes(cursor)
+                cursor.close()
+
+            unique = {(table,tuple(cols)) for (table,index,nonUnique),cols in found.items()
+                      if not nonUnique}
+            keyed = {table for table,(index,columns) in self.uniqueKeys.items()
+                     if (table,columns) in unique}
+            for table in sorted(set(self.uniqueKeys) - keyed):
+                print('Unique key missing on',table,'- run EnsureIndexes() to add it')
+            self._keyedTables = keyed
+
+        return self._keyedTables
+
+    def EnsureIndexes(self):
+        """Create any of the indexes this library relies on that are missing
+        from the schema.  Requires the INDEX privilege on the tables."""
+        with self._Connection() as conn:
+            cursor = conn.cursor()
+
+            found = self._SchemaIndexes(cursor)
+            unique = {(table,tuple(cols)) for (table,index,nonUnique),cols in found.items()
+                      if not nonUnique}
+            anyIndex = {(table,tuple(cols)) for (table,index,nonUnique),cols in found.items()}
+            tables = {table for (table,index,nonUnique) in found}
+
+            for table,(index,columns) in self.uniqueKeys.items():
+                if (table,columns) not in unique:
+                    query = " ".join(("CREATE UNIQUE INDEX",index,"ON",table,
+                                      "(",",".join(columns),")"))
+                    if self.devmode:
+                        print(query)
+                    cursor.execute(query)
+
+            # Any index, unique or not, over the same columns will serve.  The
+            # tables here need not all exist (playground is only used in
+            # devmode), so those missing from the schema are skipped.
+            for table,(index,columns) in self.indexes.items():
+                if table in tables and (table,columns) not in anyIndex:
+                    query = " ".join(("CREATE INDEX",index,"ON",table,
+                                      "(",",".join(columns),")"))
+                    if self.devmode:
+                        print(query)
+                    cursor.execute(query)
+
+            cursor.close()
+
+        # Every unique key is now in place
+        self._keyedTables = set(self.uniqueKeys)
+
     def Select(self,table,columns=[],order=None,**kwargs):
         """Execute a SELECT MySQL command
         Parameters:
@@ -138,49 +588,143 @@ class Database(object):
             columns - string list, names of columns to select, optional
             kwargs - key/value pairs of conditions, i.e. for an ID == 1:
                         ID=EQ(1)"""
-        # Determine if any columns are requested
-        cols = ",".join(columns) if columns else '*'
+        query,params = _SelectQuery(table,columns,order,kwargs)
+
+        if self.devmode:
+            print(query,params)
 
-        # Build the base query
-        query = " ".join(["SELECT",cols,"FROM",table])
+        # Execute this command
+        with self._Connection() as conn:
+            cursor = self._Statement(conn,query)
+            cursor.execute(query,params)
+            rows = cursor.fetchall()
 
-        # Add on any conditions
-        if kwargs:
-            options = [" ".join([k,v['comp'],str(v['val'])]) for k,v in kwargs.items()]
-            query += " WHERE " + " AND ".join(options)
+        return rows
 
-        # Optional ordering
-        if order:
-            query += ' ORDER BY ' + order
+    def _Missing(self,table,IDs):
+        """List the IDs that are not cached yet for a table"""
+        if table in self.refTables:
+            self._LoadReference(table)
+        cache = self._idCache[table]
+        return [ID for ID in set(IDs) if ID not in cache]
+
+    def _PrefetchOwners(self,IDs):
+        """Cache all of the given owners using a single query"""
+        missing = self._Missing('Owners',IDs)
+        if missing:
+            for row in self.Select('Owners',['ownerName','ownerDesc','ownerID','ownerDTG'],
+                                   ownerID=In(missing)):
+                self._Remember('Owners',Owner.FromRow(*row))
+
+    def _PrefetchProjects(self,IDs):
+        """Cache all of the given projects, and their owners, in two queries"""
+        missing = self._Missing('Projects',IDs)
+        if missing:
+            rows = self.Select('Projects',['projName','projDesc','ownerID','projID','projDTG'],
+                               projID=In(missing))
+            self._PrefetchOwners(row[2] for row in rows)
+            owners = self._idCache['Owners']
+            for row in rows:
+                self._Remember('Projects',Project.FromRow(row[0],row[1],owners[row[2]],row[3],row[4]))
+
+    def _PrefetchSystems(self,IDs):
+        """Cache all of the given systems along with their ancestors"""
+        missing = self._Missing('Systems',IDs)
+        if missing:
+            rows = self.Select('Systems',['sysName','sysDesc','projID','sysID','sysDTG'],
+                               sysID=In(missing))
+            self._PrefetchProjects(row[2] for row in rows)
+            projects = self._idCache['Projects']
+            for row in rows:
+                self._Remember('Systems',System.FromRow(row[0],row[1],projects[row[2]],row[3],row[4]))
+
+    def _PrefetchManufacturers(self,IDs):
+        """Cache all of the given manufacturers using a single query"""
+        missing = self._Missing('Manufacturers',IDs)
+        if missing:
+            for row in self.Select('Manufacturers',['mfgName','mfgDesc','mfgURL','mfgID','mfgDTG'],
+                                   mfgID=In(missing)):
+                self._Remember('Manufacturers',Manufacturer.FromRow(*row))
+
+    def _PrefetchDevices(self,IDs):
+        """Cache all of the given devices along with their ancestors"""
+        missing = self._Missing('Devices',IDs)
+        if missing:
+            rows = self.Select('Devices',['devName','devDesc','sysID','devURL','mfgID','devID','devDTG'],
+                               devID=In(missing))
+            self._PrefetchSystems(row[2] for row in rows)
+            self._PrefetchManufacturers(row[4] for row in rows)
+            systems = self._idCache['Systems']
+            mfgs = self._idCache['Manufacturers']
+            for row in rows:
+                self._Remember('Devices',Device.FromRow(row[0],row[1],systems[row[2]],row[3],
+                                                mfgs[row[4]],row[5],row[6]))
+
+    def _PrefetchUnits(self,IDs):
+        """Cache all of the given units using a single query"""
+        missing = self._Missing('Units',IDs)
+        if missing:
+            for row in self.Select('Units',['unitShort','unitLong','unitDesc','unitID'],
+                                   unitID=In(missing)):
+                self._Remember('Units',Units.FromRow(*row))
+
+    def _ResolvePath(self,names):
+        """Resolve a nomenclature down to the project, system or device level in
+        one query, building (or reusing from the cache) the object of each level
+        Parameters:
+            names - string list, owner, project[, system[, device]] names
+        Returns the object of the last level, or None if the path does not exist"""
+        query = _PathSQL(len(names))
 
         if self.devmode:
-            print(query)
+            print(query,names)
 
-        # Execute this command
-        cursor = self.conn.cursor()
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        cursor.close()
+        with self._Connection() as conn:
+            cursor = self._Statement(conn,query)
+            cursor.execute(query,tuple(names))
+            rows = cursor.fetchall()
 
-        return rows
+        if not rows:
+            return None
+
+        row = rows[0]
+        cache = self._idCache
+        obj = cache['Owners'].get(row[2]) or self._Remember('Owners',Owner.FromRow(*row[0:4]))
+        if len(names) > 1:
+            obj = cache['Projects'].get(row[6]) or \
+                  self._Remember('Projects',Project.FromRow(row[4],row[5],obj,row[6],row[7]))
+        if len(names) > 2:
+            obj = cache['Systems'].get(row[10]) or \
+                  self._Remember('Systems',System.FromRow(row[8],row[9],obj,row[10],row[11]))
+        if len(names) > 3:
+            obj = cache['Devices'].get(row[16]) or \
+                  self._Remember('Devices',Device.FromRow(row[12],row[13],obj,row[14],
+                                                  self.GetManufacturer(ID=row[15]),row[16],row[17]))
+        return obj
+
+    def _GetParent(self,names):
+        """Obtain the parent group of a new or requested entry
+        Parameters:
+            names - string list, names of the parent's nomenclature"""
+        parent = self._ResolvePath(names)
+        if parent:
+            return parent
+
+        # Walk the chain level by level so that a missing ancestor is reported,
+        # this returns None when only the parent itself is missing
+        getter = (self.GetProject,self.GetSystem,self.GetDevice)[len(names)-2]
+        return getter(Sep(*names))
 
     def CreateNewOwner(self,name,desc):
         """Add a new owner to the database
         Parameters:
             name - string, 12 char max, name to use in full nomenclature
             desc - string, 255 char max, brief description of the owner"""
-        # Make sure this is not a duplicate entry
-        if self.GetOwner(name):
-            print('This owner already exists')
-            raise DatabaseException('This owner already exists in the databse')
-
-        # Insert into the database
-        ID = self.Insert('Owners',ownerName=Enquote(name),ownerDesc=Enquote(desc))
+        # Insert into the database, stamped here so it need not be read back
+        DTG = self._Now('Owners','ownerDTG')
+        ID = self._InsertNew('Owners','Owner',name,ownerName=name,ownerDesc=desc,ownerDTG=DTG)
 
-        # Pull the new entry to fill in Owner object
-        DTG = self.Select('Owners',['ownerDTG'],ownerID=EQ(ID))[0][0]
-
-        return Owner(name,desc,ID,DTG)
+        return self._Remember('Owners',Owner(name,desc,ID,DTG))
 
     
 
@@ -188,18 +732,25 @@ class Database(object):
         """Selects an owner from the database
         Parameters:
             name - string, 12 char max, name used in full nomenclature"""
+        # Serve from memory, only rows added since the load need the DB
+        self._LoadReference('Owners')
+
         # Pull the full row for this owner from the DB
         if ID:
+            if ID in self._idCache['Owners']:
+                return self._idCache['Owners'][ID]
             rows = self.Select('Owners',['ownerName','ownerDesc','ownerID','ownerDTG'],ownerID=EQ(ID))
         else:
-            rows = self.Select('Owners',['ownerName','ownerDesc','ownerID','ownerDTG'],ownerName=EQ(Enquote(name)))
+            if name in self._nameCache['Owners']:
+                return self._nameCache['Owners'][name]
+            rows = self.Select('Owners',['ownerName','ownerDesc','ownerID','ownerDTG'],ownerName=EQ(name))
 
         # check if there was a result found
         if not rows:
             return None
 
         row = rows[0]
-        return Owner(row[0],row[1],row[2],row[3])
+        return self._Remember('Owners',Owner.FromRow(row[0],row[1],row[2],row[3]))
 
     def CreateNewProject(self,name,desc):
         """Add a new project to the database
@@ -210,20 +761,18 @@ class Database(object):
         # Get owner and project name
         oName,pName = name.split('.')
 
-        # Make sure this is not a duplicate entry (raises exception if owner doesnt exist)
-        if self.GetProject(name):
-            print('Project',name,'already exists')
-            raise DatabaseException('Project already exists')
-
         # Get owner info
         owner = self.GetOwner(oName)
+        if not owner:
+            print('Owner',oName,'is not in the database')
+            raise DatabaseException('Invalid owner name')
 
         # Insert into the database
-        ID = self.Insert('Projects',projName=Enquote(pName),projDesc=Enquote(desc),ownerID=owner.ID)
+        DTG = self._Now('Projects','projDTG')
+        ID = self._InsertNew('Projects','Project',name,projName=pName,projDesc=desc,
+                             ownerID=owner.ID,projDTG=DTG)
 
-        # Pull new entry
-        DTG = self.Select('Projects',['projDTG'],projID=EQ(ID))[0][0]      
-        return Project(pName,desc,owner,ID,DTG)
+        return self._Remember('Projects',Project(pName,desc,owner,ID,DTG))
 
     def GetProject(self,name='',ID=None):
         """Select a project from the database
@@ -231,6 +780,8 @@ class Database(object):
             name - string, full nomenclature"""
             
         if ID:
+            if ID in self._idCache['Projects']:
+                return self._idCache['Projects'][ID]
             rows = self.Select('Projects',['projName','projDesc','projID','projDTG','ownerID'],projID=EQ(ID))
         else:
             # Get owner and project name
@@ -243,14 +794,14 @@ class Database(object):
                 raise DatabaseException('Invalid owner name')
     
             # Pull entry from the database
-            rows = self.Select('Projects',['projName','projDesc','projID','projDTG','ownerID'],projName=EQ(Enquote(pName)),ownerID=EQ(owner.ID))
+            rows = self.Select('Projects',['projName','projDesc','projID','projDTG','ownerID'],projName=EQ(pName),ownerID=EQ(owner.ID))
 
         # check if there was a result found
         if not rows:
             return None
 
         row = rows[0]
-        return Project(row[0],row[1],self.GetOwner(ID=row[4]),row[2],row[3])
+        return self._Remember('Projects',Project.FromRow(row[0],row[1],self.GetOwner(ID=row[4]),row[2],row[3]))
 
     def CreateNewSystem(self,name,desc):
         """Create a new system in the database
@@ -259,21 +810,20 @@ class Database(object):
             desc - string, 255 char max, brief description of the system"""
         # Get the names
         oName,pName,sName = name.split('.')
-        # This checks if system exists and if parents dont
-        if self.GetSystem(name):
-            print('System',name,'already exists')
-            raise DatabaseException('System already exists')
+        top = Sep(oName,pName)
 
-        # Get project info
-        project = self.GetProject(Sep(oName,pName))
+        # Get project info (raises exception if owner doesnt exist)
+        project = self._GetParent([oName,pName])
+        if not project:
+            print('Project',top,'is not in the database')
+            raise DatabaseException('Invalid project name')
 
         # Insert into database
-        ID = self.Insert('Systems',sysName=Enquote(sName),sysDesc=Enquote(desc),projID=project.ID)
-
-        # Pull timestamp
-        DTG = self.Select('Systems',['sysDTG'],sysID=EQ(ID))[0][0]
+        DTG = self._Now('Systems','sysDTG')
+        ID = self._InsertNew('Systems','System',name,sysName=sName,sysDesc=desc,
+                             projID=project.ID,sysDTG=DTG)
 
-        return System(sName,desc,project,ID,DTG)
+        return self._Remember('Systems',System(sName,desc,project,ID,DTG))
 
     
     def GetSystem(self,name='',ID=None):
@@ -282,6 +832,8 @@ class Database(object):
             name - string, full nomenclature"""
         
         if ID:
+            if ID in self._idCache['Systems']:
+                return self._idCache['Systems'][ID]
             rows = self.Select('Systems',['sysName','sysDesc','sysID','sysDTG','projID'],sysID=EQ(ID))
         else:
             # Get the names
@@ -295,14 +847,14 @@ class Database(object):
                 raise DatabaseException('Invalid project name')
     
             # Pull from the database
-            rows = self.Select('Systems',['sysName','sysDesc','sysID','sysDTG','projID'],sysName=EQ(Enquote(sName)),projID=EQ(project.ID))
+            rows = self.Select('Systems',['sysName','sysDesc','sysID','sysDTG','projID'],sysName=EQ(sName),projID=EQ(project.ID))
 
         # Check if a result was found
         if not rows:
             return None
 
         row = rows[0]
-        return System(row[0],row[1],self.GetProject(ID=row[4]),row[2],row[3])
+        return self._Remember('Systems',System.FromRow(row[0],row[1],self.GetProject(ID=row[4]),row[2],row[3]))
 
     def CreateNewManufacturer(self,name,desc,URL):
         """Add a new manufacturer to the database
@@ -310,38 +862,39 @@ class Database(object):
             name - string, 255 char max, name (unique) of the manufacturer
             desc - string, 255 char max, brief description of the manufacturer
             URL - string, 255 char max, URL of the manufacturer's website"""
-        # Check if this manufacturer exists already
-        if self.GetManufacturer(name):
-            print('Manufacturer',name,'already exists')
-            raise DatabaseException('Manufacturer already exists')
-
         # Add to the database
-        ID = self.Insert('Manufacturers',mfgName=Enquote(name),mfgDesc=Enquote(desc),mfgURL=Enquote(URL))
+        DTG = self._Now('Manufacturers','mfgDTG')
+        ID = self._InsertNew('Manufacturers','Manufacturer',name,mfgName=name,mfgDesc=desc,
+                             mfgURL=URL,mfgDTG=DTG)
 
-        # Get the timestamp
-        DTG = self.Select('Manufacturers',['mfgDTG'],mfgID=EQ(ID))[0][0]
-
-        return Manufacturer(name,desc,URL,ID,DTG)
+        return self._Remember('Manufacturers',Manufacturer(name,desc,URL,ID,DTG))
 
     def GetManufacturer(self,name="",ID=None):
         """Select the manufacturer from the database
         Parameters:
             name - string, 255 char max, unique name of the manufacturer
             ID - int, internal database ID"""
+        # Serve from memory, only rows added since the load need the DB
+        self._LoadReference('Manufacturers')
+
         # Pull row from database
         if ID:
+            if ID in self._idCache['Manufacturers']:
+                return self._idCache['Manufacturers'][ID]
             rows = self.Select('Manufacturers',['mfgName','mfgDesc','mfgURL','mfgID','mfgDTG'],
                            mfgID=EQ(ID))
         else:
+            if name in self._nameCache['Manufacturers']:
+                return self._nameCache['Manufacturers'][name]
             rows = self.Select('Manufacturers',['mfgName','mfgDesc','mfgURL','mfgID','mfgDTG'],
-                           mfgName=EQ(Enquote(name)))
+                           mfgName=EQ(name))
 
         # Check for a result
         if not rows:
             return None
 
         row = rows[0]
-        return Manufacturer(row[0],row[1],row[2],row[3],row[4])
+        return self._Remember('Manufacturers',Manufacturer.FromRow(row[0],row[1],row[2],row[3],row[4]))
 
     def CreateNewDevice(self,name,desc,URL,mfg):
         """Create a new device in the database
@@ -358,22 +911,20 @@ class Database(object):
             print('Manufacturer is required to create a new device')
             raise DatabaseException('Manufacturer required')
 
-        # Check if this device exists
-        if self.GetDevice(name):
-            print('Device',name,'already exists')
-            raise DatabaseException('Device already exists')
+        top = Sep(oName,pName,sName)
 
-        # Get system info
-        system = self.GetSystem(Sep(oName,pName,sName))
+        # Get system info (raises exception if its parents dont exist)
+        system = self._GetParent([oName,pName,sName])
+        if not system:
+            print('System',top,'does not exist')
+            raise DatabaseException('System does not exist')
 
         # Add to database
-        ID = self.Insert('Devices',devName=Enquote(dName),devDesc=Enquote(desc),
-                         devURL=Enquote(URL),mfgID=mfg.ID,sysID=system.ID)
-
-        # Get timestamp
-        DTG = self.Select('Devices',['devDTG'],devID=EQ(ID))[0][0]
+        DTG = self._Now('Devices','devDTG')
+        ID = self._InsertNew('Devices','Device',name,devName=dName,devDesc=desc,devURL=URL,
+                             mfgID=mfg.ID,sysID=system.ID,devDTG=DTG)
 
-        return Device(dName,desc,system,URL,mfg,ID,DTG)
+        return self._Remember('Devices',Device(dName,desc,system,URL,mfg,ID,DTG))
 
     def GetDevice(self,name='',ID=None):
         """Select a device from the database
@@ -381,6 +932,8 @@ class Database(object):
             name - string, full nomenclature"""
             
         if ID:
+            if ID in self._idCache['Devices']:
+                return self._idCache['Devices'][ID]
             rows = self.Select('Devices',['devName','devDesc','sysID','devURL','mfgID','devID','devDTG'],
                            devID=EQ(ID))
         else:
@@ -396,7 +949,7 @@ class Database(object):
     
             # Pull from database
             rows = self.Select('Devices',['devName','devDesc','sysID','devURL','mfgID','devID','devDTG'],
-                               devName=EQ(Enquote(dName)),sysID=EQ(system.ID))
+                               devName=EQ(dName),sysID=EQ(system.ID))
 
         # check if there was a result
         if not rows:
@@ -405,7 +958,7 @@ class Database(object):
         row = list(rows[0])
         row[2] = self.GetSystem(ID=row[2])
         row[4] = self.GetManufacturer(ID=row[4])
-        return Device(*row)
+        return self._Remember('Devices',Device.FromRow(*row))
 
     def CreateNewUnits(self,short,long,desc):
         """Add new unit of measure to the database
@@ -413,35 +966,36 @@ class Database(object):
             short - string, 25 char max, short form of units, i.e. m/s
             long - string, 255 char max, long form of units, i.e. meters per second
             desc - string, 255 char max, description of units, i.e. velocity"""
-        # Verify these units do not exist yet - long name is unique index
-        if self.GetUnits(long):
-            print('Units',long,'already exist in the database')
-            raise DatabaseException('Units already exist')
+        # Add to the database - long name is unique index
+        ID = self._InsertNew('Units','Units',long,unitShort=short,unitLong=long,unitDesc=desc)
 
-        # Add to the database
-        ID = self.Insert('Units',unitShort=Enquote(short),unitLong=Enquote(long),
-                         unitDesc=Enquote(desc))
-
-        return Units(short,long,desc,ID)
+        return self._Remember('Units',Units(short,long,desc,ID))
 
     def GetUnits(self,long='',ID=None):
         """Select unit of measure from the database
         Parameters:
             long - string, 255 char max, long form of units, i.e. meters per second"""
+        # Serve from memory, only rows added since the load need the DB
+        self._LoadReference('Units')
+
         # Select from database
         if ID:
+            if ID in self._idCache['Units']:
+                return self._idCache['Units'][ID]
             rows = self.Select('Units',['unitShort','unitLong','unitDesc','unitID'],
                                unitID=EQ(ID))
         else:
+            if long in self._nameCache['Units']:
+                return self._nameCache['Units'][long]
             rows = self.Select('Units',['unitShort','unitLong','unitDesc','unitID'],
-                               unitLong=EQ(Enquote(long)))
+                               unitLong=EQ(long))
 
         # Check if there was a result
         if not rows:
             return None
 
         row = rows[0]
-        return Units(*row)
+        return self._Remember('Units',Units.FromRow(*row))
 
     def CreateNewSensor(self,name,desc,units):
         """Add new sensor to the database
@@ -458,20 +1012,16 @@ class Database(object):
             print('Units are required to create a new sensor')
             raise DatabaseException('Units required')
 
-        # Check if this sensor exists already
-        if self.GetSensor(name):
-            print('Sensor',name,'already exists')
-            raise DatabaseException('Sensor already exists')
-
-        # Get info on the device
-        device = self.GetDevice(top)
+        # Get info on the device (raises exception if its parents dont exist)
+        device = self._GetParent([oName,pName,sName,dName])
+        if not device:
+            print('Device',top,'does not exist')
+            raise DatabaseException('Device not found')
 
         # Add to the database
-        ID = self.Insert('Sensors',senName=Enquote(SName),senDesc=Enquote(desc),
-                         devID=device.ID,unitID=units.ID)
-
-        # Pull timestamp
-        DTG = self.Select('Sensors',['senDTG'],senID=EQ(ID))[0][0]
+        DTG = self._Now('Sensors','senDTG')
+        ID = self._InsertNew('Sensors','Sensor',name,senName=SName,senDesc=desc,
+                             devID=device.ID,unitID=units.ID,senDTG=DTG)
 
         return Sensor(SName,desc,device,units,ID,DTG)
 
@@ -488,14 +1038,14 @@ class Database(object):
             top = Sep(oName,pName,sName,dName)
     
             # Check if parent exists
-            device = self.GetDevice(top)
+            device = self._GetParent([oName,pName,sName,dName])
             if not device:
                 print('Device',top,'does not exist')
                 raise DatabaseException('Device not found')
     
             # Pull from database
             rows = self.Select('Sensors',['senName','senDesc','devID','unitID','senID','senDTG'],
-                               senName=EQ(Enquote(SName)),devID=EQ(device.ID))
+                               senName=EQ(SName),devID=EQ(device.ID))
 
         # Check for result
         if not rows:
@@ -504,7 +1054,7 @@ class Database(object):
         row = list(rows[0])
         row[2] = self.GetDevice(ID=row[2])
         row[3] = self.GetUnits(ID=row[3])
-        return Sensor(*row)
+        return Sensor.FromRow(*row)
 
     def RecordMeasurement(self,sensor,data,error):
         """Record a measurement to the database
@@ -512,44 +1062,123 @@ class Database(object):
             sensor - Sensor, sensor taking the measurement
             data - double, value of the measurement
             error - double, uncertainty in the measurement"""
+        return self.RecordMeasurements(sensor,[data],[error])[0]
+
+    def RecordMeasurements(self,sensor,data,error):
+        """Record a series of measurements to the database in bulk
+        Parameters:
+            sensor - Sensor, sensor taking the measurements
+            data - double array, values of the measurements
+            error - double array, uncertainties in the measurements"""
         # Check that a sensor exists
         if not sensor:
             print('A sensor is reuqired to take a measurement')
             raise DatabaseException('Invalid sensor')
 
-        ID = self.Insert(self.recTable,recData=data,recError=error,senID=sensor.ID)
+        if len(data) != len(error):
+            print('Every measurement requires an uncertainty')
+            raise DatabaseException('Mismatched data and error')
+
+        query = _InsertSQL(self.recTable,('recData','recError','senID','recDTG'))
 
-        # Pull timestamp
-        DTG = self.Select(self.recTable,['recDTG'],recID=EQ(ID))[0][0]
+        # The whole series is stamped once here, rather than read back per row
+        DTG = self._Now(self.recTable,'recDTG')
+        rows = [(float(y),float(dy),sensor.ID,DTG) for y,dy in zip(data,error)]
+        if not rows:
+            return []
 
-        return Record(data,error,sensor,ID,DTG)
+        if self.devmode:
+            print(query,len(rows),'rows')
 
-    def GetRecords(self,sensor,startTime,endTime):
+        IDs = []
+
+        with self._Connection() as conn:
+            # A plain cursor folds each batch into one multi-row INSERT, whose
+            # AUTO_INCREMENT IDs are consecutive starting at lastrowid
+            cursor = self._Statement(conn,query,prepared=False)
+            for start in range(0,len(rows),self.batchSize):
+                batch = rows[start:start+self.batchSize]
+                cursor.executemany(query,batch)
+                firstID = cursor.lastrowid
+                IDs.extend(range(firstID,firstID+len(batch)))
+
+            conn.commit()
+
+        return [Record(row[0],row[1],sensor,ID,DTG) for row,ID in zip(rows,IDs)]
+
+    def GetRecords(self,sensor,startTime,endTime,chunkSize=100000):
         """Obtain records from a date range for a sensor
         Parameters:
             sensor - Sensor, sensor to obtain records from
             startTime - DateTime, starting time
-            endTime - DateTime, ending time"""
+            endTime - DateTime, ending time
+            chunkSize - int, number of rows pulled from the server at a time"""
         # Check for a sensor
         if not sensor:
             print('Sensor required to obtain record form')
             raise DatabaseException('Sensor Required')
 
-        rows = self.Select(self.recTable,['recData','recError','recDTG','recID'],
-                           'recDTG ASC',senID=EQ(sensor.ID),
-                           recDTG=InRange(EnDate(startTime),EnDate(endTime)))
-        
+        query,params = _SelectQuery(self.recTable,['recData','recError','recID',_EpochDTG],
+                                    'recDTG ASC',{'senID':EQ(sensor.ID),
+                                                  'recDTG':InRange(startTime,endTime)})
+
+        if self.devmode:
+            print(query,params)
+
+        # The rows go from the cursor into the set's array a chunk at a time
+        with self._Connection() as conn:
+            cursor = self._Statement(conn,query)
+            cursor.execute(query,params)
+            records = RecordSet.FromCursor(cursor,sensor,chunkSize)
+
         # Check if there was a result
-        if not rows:
+        if not records.N:
             return None
-        
-        records = []
-        for row in rows:
-            record = Record(row[0],row[1],sensor,row[3],row[2])
-            records.append(record)
 
-        return RecordSet(records)
+        return records
     
+    def GetRecordsDF(self,sensor,startTime,endTime,chunkSize=100000):
+        """Obtain records from a date range for a sensor as a pandas DataFrame
+        Parameters:
+            sensor - Sensor, sensor to obtain records from
+            startTime - DateTime, starting time
+            endTime - DateTime, ending time
+            chunkSize - int, number of rows pulled from the server at a time"""
+        if pd is None:
+            print('pandas is required to obtain records as a DataFrame')
+            raise DatabaseException('pandas not installed')
+
+        # Check for a sensor
+        if not sensor:
+            print('Sensor required to obtain record form')
+            raise DatabaseException('Sensor Required')
+
+        query = " ".join(("SELECT recData,recError," + _EpochDTG + ",recID FROM",self.recTable,
+                          "WHERE senID = %s AND recDTG BETWEEN %s AND %s ORDER BY recDTG ASC"))
+        columns = ['data','error','dtg','id']
+
+        if self.devmode:
+            print(query)
+
+        # Stream the rows off of an unbuffered cursor so that only one chunk
+        # of Python tuples exists at a time
+        frames = []
+        with self._Connection() as conn:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(query,(sensor.ID,startTime,endTime))
+            rows = cursor.fetchmany(chunkSize)
+            while rows:
+                frames.append(pd.DataFrame.from_records(rows,columns=columns))
+                rows = cursor.fetchmany(chunkSize)
+            cursor.close()
+
+        if not frames:
+            return pd.DataFrame(columns=columns)
+
+        df = pd.concat(frames,ignore_index=True)
+        df['dtg'] = df['dtg'].to_numpy(dtype='i8').view('datetime64[us]')
+        return df
+
     def GetMostRecentRecord(self,sensor):
         """Obtain the most recent record for a sensor
         Parameters:
@@ -560,7 +1189,7 @@ class Database(object):
             raise DatabaseException('Sensor Required')
             
         rows = self.Select(self.recTable,['recData','recError','recDTG','recID'],
-                          'recDTG DESC LIMIT 1',senID=EQ(sensor.ID))
+                          'recDTG DESC,recID DESC LIMIT 1',senID=EQ(sensor.ID))
         
         # Check if there was a result
         if not rows:
@@ -568,8 +1197,41 @@ class Database(object):
         
         row = rows[0]
         return Record(row[0],row[1],sensor,row[3],row[2])
-        
-    
+
+    def GetMostRecentRecords(self,sensors):
+        """Obtain the most recent record for each of several sensors with a
+        single query.  Returns a list in the same order as sensors, with None
+        for any sensor that has no records.
+        Parameters:
+            sensors - Sensor array, sensors to obtain records from"""
+        # Check for sensors
+        if not sensors or not all(sensors):
+            print('Sensors required to obtain records from')
+            raise DatabaseException('Sensor Required')
+
+        # Pad the IN list to a power of two, as Select does, so that only a
+        # few distinct statements ever get prepared
+        IDs = list({s.ID for s in sensors})
+        n = 1 << (len(IDs)-1).bit_length()
+        params = tuple(IDs + IDs[-1:]*(n-len(IDs)))
+        query = _LatestSQL(self.recTable,n)
+
+        if self.devmode:
+            print(query,params)
+
+        with self._Connection() as conn:
+            cursor = self._Statement(conn,query)
+            cursor.execute(query,params)
+            rows = cursor.fetchall()
+
+        latest = {row[0]:row for row in rows}
+        records = []
+        for s in sensors:
+            row = latest.get(s.ID)
+            records.append(Record(row[1],row[2],s,row[4],row[3]) if row else None)
+
+        return records
+
     def GetOwners(self):
         """Obtain a list of all owners"""
         rows = self.Select('Owners',['ownerName','ownerDesc','ownerID','ownerDTG'])
@@ -580,7 +1242,7 @@ class Database(object):
         owners = []
         
         for row in rows:
-            owners.append(Owner(*row))
+            owners.append(self._Remember('Owners',Owner.FromRow(*row)))
             
         return owners
     
@@ -594,12 +1256,16 @@ class Database(object):
         if not rows:
             return None
         
+        # Pull all of the owners at once
+        self._PrefetchOwners(row[2] for row in rows)
+        owners = self._idCache['Owners']
+
         projects = []
         
         for row in rows:
             r = list(row)
-            r[2] = self.GetOwner(ID=row[2])
-            projects.append(Project(*r))
+            r[2] = owners[row[2]]
+            projects.append(self._Remember('Projects',Project.FromRow(*r)))
             
         return projects
     
@@ -615,11 +1281,15 @@ class Database(object):
         if not rows:
             return None
         
+        # Pull all of the projects at once
+        self._PrefetchProjects(row[2] for row in rows)
+        projects = self._idCache['Projects']
+
         systems = []
         for row in rows:
             r = list(row)
-            r[2] = self.GetProject(ID=row[2])
-            systems.append(System(*r))
+            r[2] = projects[row[2]]
+            systems.append(self._Remember('Systems',System.FromRow(*r)))
             
         return systems
     
@@ -632,7 +1302,7 @@ class Database(object):
         
         mfgs = []
         for row in rows:
-            mfgs.append(Manufacturer(*row))
+            mfgs.append(self._Remember('Manufacturers',Manufacturer.FromRow(*row)))
             
         return mfgs
     
@@ -649,12 +1319,18 @@ class Database(object):
         if not rows:
             return None
         
+        # Pull all of the systems and manufacturers at once
+        self._PrefetchSystems(row[2] for row in rows)
+        self._PrefetchManufacturers(row[4] for row in rows)
+        systems = self._idCache['Systems']
+        mfgs = self._idCache['Manufacturers']
+
         devices = []
         for row in rows:
             r = list(row)
-            r[2] = self.GetSystem(ID=row[2])
-            r[4] = self.GetManufacturer(ID=row[4])
-            devices.append(Device(*r))
+            r[2] = systems[row[2]]
+            r[4] = mfgs[row[4]]
+            devices.append(self._Remember('Devices',Device.FromRow(*r)))
             
         return devices
     
@@ -667,7 +1343,7 @@ class Database(object):
         
         units = []
         for row in rows:
-            units.append(Units(*row))
+            units.append(self._Remember('Units',Units.FromRow(*row)))
             
         return units
     
@@ -684,21 +1360,205 @@ class Database(object):
         if not rows:
             return None
         
+        # Pull all of the devices and units at once
+        self._PrefetchDevices(row[2] for row in rows)
+        self._PrefetchUnits(row[3] for row in rows)
+        devices = self._idCache['Devices']
+        units = self._idCache['Units']
+
         sensors = []
         for row in rows:
             r = list(row)
-            r[2] = self.GetDevice(ID=row[2])
-            r[3] = self.GetUnits(ID=row[3])
-            sensors.append(Sensor(*r))
+            r[2] = devices[row[2]]
+            r[3] = units[row[3]]
+            sensors.append(Sensor.FromRow(*r))
             
         return sensors
-            
+
+class AsyncDatabase(object):
+    """Encapsulates a pool of asyncio MySQL connections, for callers that
+    want to overlap many independent queries"""
+
+    def __init__(self,host,dbname,user,pw,devmode=False,poolSize=10):
+        """Prepares the database connection, which is opened by Connect()
+        Parameters:
+            host - string, URL of the DB server
+            dbname - string, name of the schema to connect to
+            user - string, user name for login
+            pw - string, password associated with provided user name
+            poolSize - int, maximum number of concurrent connections"""
+        if aiomysql is None:
+            print('aiomysql is required for asynchronous database access')
+            raise DatabaseException('aiomysql not installed')
+
+        # Make sure that the input arguments are filled
+        if "" in (host,dbname,user,pw):
+            raise DatabaseException("You must provide all initialization parameters")
+
+        # aiomysql closes, rather than reuses, a connection released with a
+        # transaction still open, so queries must not leave one behind
+        self.config = { 'user' : user,
+                        'password' : pw,
+                        'host' : host,
+                        'db' : dbname,
+                        'autocommit' : True,
+                        'minsize' : 1,
+                        'maxsize' : poolSize }
+
+        self.devmode = devmode
+        self.recTable = 'playground' if devmode else 'Records'
+        self.pool = None
+
+    async def Connect(self):
+        """Open the connection pool"""
+        self.pool = await aiomysql.create_pool(**self.config)
+
+    async def Close(self):
+        """Close all of the pooled database connections"""
+        self.pool.close()
+        await self.pool.wait_closed()
+
+    async def Insert(self,table,**kwargs):
+        """Execute an INSERT MySQL command.
+        Pass in a dictionary of key/value pairs to insert."""
+        query,params = _InsertQuery(table,kwargs)
+
+        if self.devmode:
+            print(query,params)
+
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query,params)
+                lastID = cursor.lastrowid
+            await conn.commit()
+
+        return lastID
+
+    async def Select(self,table,columns=[],order=None,**kwargs):
+        """Execute a SELECT MySQL command
+        Parameters:
+            table - string, name of the table to query
+            columns - string list, names of columns to select, optional
+            kwargs - key/value pairs of conditions, i.e. for an ID == 1:
+                        ID=EQ(1)"""
+        query,params = _SelectQuery(table,columns,order,kwargs)
+
+        if self.devmode:
+            print(query,params)
+
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query,params)
+                return await cursor.fetchall()
+
+    async def GetMostRecentRecord(self,sensor):
+        """Obtain the most recent record for a sensor
+        Parameters:
+            sensor - Sensor, sensor to obtain record from"""
+        # Check for a sensor
+        if not sensor:
+            print('Sensor required to obtain record form')
+            raise DatabaseException('Sensor Required')
+
+        rows = await self.Select(self.recTable,['recData','recError','recDTG','recID'],
+                                 'recDTG DESC,recID DESC LIMIT 1',senID=EQ(sensor.ID))
+
+        # Check if there was a result
+        if not rows:
+            return None
+
+        row = rows[0]
+        return Record(row[0],row[1],sensor,row[3],row[2])
+
+    async def GetMostRecentRecords(self,sensors):
+        """Obtain the most recent record for each of several sensors, with the
+        queries running concurrently
+        Parameters:
+            sensors - Sensor array, sensors to obtain records from"""
+        return await asyncio.gather(*[self.GetMostRecentRecord(s) for s in sensors])
+
+    async def GetRecords(self,sensor,startTime,endTime):
+        """Obtain records from a date range for a sensor
+        Parameters:
+            sensor - Sensor, sensor to obtain records from
+            startTime - DateTime, starting time
+            endTime - DateTime, ending time"""
+        # Check for a sensor
+        if not sensor:
+            print('Sensor required to obtain record form')
+            raise DatabaseException('Sensor Required')
+
+        rows = await self.Select(self.recTable,['recData','recError','recID',_EpochDTG],
+                                 'recDTG ASC',senID=EQ(sensor.ID),
+                                 recDTG=InRange(startTime,endTime))
+
+        # Check if there was a result
+        if not rows:
+            return None
+
+        return RecordSet.FromRows(rows,sensor,epoch=True)
+
+    async def GetRecordsMany(self,sensors,startTime,endTime):
+        """Obtain records from a date range for each of several sensors, with
+        the queries running concurrently over the pool
+        Parameters:
+            sensors - Sensor array, sensors to obtain records from
+            startTime - DateTime, starting time
+            endTime - DateTime, ending time"""
+        return await asyncio.gather(*[self.GetRecords(s,startTime,endTime) for s in sensors])
+
+def RunAsync(coro):
+    """Run a coroutine, such as an AsyncDatabase query, to completion from
+    synchronous code.  The event loop is uvloop's when it is installed.
+    Parameters:
+        coro - coroutine to run"""
+    if uvloop is None:
+        return asyncio.run(coro)
+
+    # The loop is run on its own, rather than installing uvloop's policy for
+    # the whole process.  uvloop.run (uvloop 0.18) does this on any Python.
+    if hasattr(uvloop,'run'):
+        return uvloop.run(coro)
+    if hasattr(asyncio,'Runner'):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+
+    # Older uvloop on Python before 3.11, run and close the loop by hand
+    loop = uvloop.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+def GetRecordsMany(host,dbname,user,pw,sensors,startTime,endTime,devmode=False):
+    """Obtain records from a date range for each of several sensors from
+    synchronous code, with the queries running concurrently
+    Parameters:
+        host, dbname, user, pw - connection parameters, as for Database
+        sensors - Sensor array, sensors to obtain records from
+        startTime - DateTime, starting time
+        endTime - DateTime, ending time"""
+    async def fetch():
+        db = AsyncDatabase(host,dbname,user,pw,devmode)
+        await db.Connect()
+        try:
+            return await db.GetRecordsMany(sensors,startTime,endTime)
+        finally:
+            await db.Close()
+
+    return RunAsync(fetch())
+
 # Database model classes
 
 # Group - base class that all subsequent groups are based on
 # Handles common functionality, such as nomenclature, descriptions and DTGs
 class Group(object):
     """Base model for all groups; contains shared functionality"""  
+    __slots__ = ('name','desc','ID','DTG','parent','_nom')
+
     def __init__(self,name,desc,parent,ID=None,DTG=None):
         """Creates a Group base object
         Parameters:
@@ -720,17 +1580,36 @@ class Group(object):
         self.ID = ID
         self.DTG = DTG
         self.parent = parent
+        self._nom = None
+
+    @classmethod
+    def FromRow(cls,name,desc,parent,ID,DTG):
+        """Create a group from a row already validated by the DB, skipping the
+        argument checks done by the constructor"""
+        obj = cls.__new__(cls)
+        obj.name = name
+        obj.desc = desc
+        obj.ID = ID
+        obj.DTG = DTG
+        obj.parent = parent
+        obj._nom = None
+        return obj
 
     def Nomenclature(self):
-        """Forms the nomenclature for this group"""
-        nom = self.name
-        if self.parent:
-            nom = self.parent.Nomenclature() + '.' + nom
+        """Forms the nomenclature for this group.  It is built on the first call
+        and kept, groups are not renamed or moved once created."""
+        if self._nom is None:
+            nom = self.name
+            if self.parent:
+                nom = self.parent.Nomenclature() + '.' + nom
+            self._nom = nom
 
-        return nom
+        return self._nom
 
 class Owner(Group):
     """Model for the data in the Owners table"""
+    __slots__ = ()
+
     def __init__(self,name,desc,ID=None,DTG=None):
         """Create an owner object
         Parameters:
@@ -741,8 +1620,15 @@ class Owner(Group):
         # Owners do not have a parent group
         super().__init__(name,desc,None,ID,DTG)
 
+    @classmethod
+    def FromRow(cls,name,desc,ID,DTG):
+        """Create an owner from a row already validated by the DB"""
+        return super().FromRow(name,desc,None,ID,DTG)
+
 class Project(Group):
     """Model for the data in the Projects table"""
+    __slots__ = ()
+
     def __init__(self,name,desc,owner,ID=None,DTG=None):
         """Create a owner object
         Parameters:
@@ -762,6 +1648,8 @@ class Project(Group):
 
 class System(Group):
     """Model for the data in the Systems table"""
+    __slots__ = ()
+
     def __init__(self,name,desc,project,ID=None,DTG=None):
         """Create a system object
         Parameters:
@@ -782,6 +1670,8 @@ class System(Group):
 
 class Manufacturer(Group):
     """Model for the data in the Manufacturers table"""
+    __slots__ = ('URL',)
+
     def __init__(self,name,desc,URL,ID=None,DTG=None):
         """Create a manufacturer objec
         Parameters:
@@ -800,10 +1690,19 @@ class Manufacturer(Group):
         super().__init__(name,desc,None,ID,DTG)
         self.URL = URL
 
+    @classmethod
+    def FromRow(cls,name,desc,URL,ID,DTG):
+        """Create a manufacturer from a row already validated by the DB"""
+        obj = super().FromRow(name,desc,None,ID,DTG)
+        obj.URL = URL
+        return obj
+
             
 
 class Device(Group):
     """Model for the data in the Devices table"""
+    __slots__ = ('mfg','URL')
+
     def __init__(self,name,desc,system,URL,mfg,ID=None,DTG=None):
         """Create a device object
         Parameters:
@@ -833,8 +1732,18 @@ class Device(Group):
         self.mfg = mfg
         self.URL = URL
 
+    @classmethod
+    def FromRow(cls,name,desc,system,URL,mfg,ID,DTG):
+        """Create a device from a row already validated by the DB"""
+        obj = super().FromRow(name,desc,system,ID,DTG)
+        obj.mfg = mfg
+        obj.URL = URL
+        return obj
+
 class Units(object):
     """Model for the data in the units table"""
+    __slots__ = ('short','long','desc','ID','label')
+
     def __init__(self,short,long,desc,ID=None):
         """Create a units object
         Parameters:
@@ -843,7 +1752,7 @@ class Units(object):
             desc - string, 255 char max, decription of units
             ID - int, internal DB identifier"""
         # Verify all text arguments are filled
-        if "" in (short,long,desc):
+        if not (short and long and desc):
             raise ModelException('Description and short/long forms of units must be provided')
 
         # Check lengths of text inputs
@@ -858,9 +1767,24 @@ class Units(object):
         self.long = long
         self.desc = desc
         self.ID = ID
+        self.label = desc + ' (' + short + ')'
+
+    @classmethod
+    def FromRow(cls,short,long,desc,ID):
+        """Create units from a row already validated by the DB, skipping the
+        argument checks done by the constructor"""
+        obj = cls.__new__(cls)
+        obj.short = short
+        obj.long = long
+        obj.desc = desc
+        obj.ID = ID
+        obj.label = desc + ' (' + short + ')'
+        return obj
 
 class Sensor(Group):
     """Model for the data in the Sensors table"""
+    __slots__ = ('units',)
+
     def __init__(self,name,desc,device,units,ID=None,DTG=None):
         """Create a Sensor object
         Parameters:
@@ -883,8 +1807,17 @@ class Sensor(Group):
         super().__init__(name,desc,device,ID,DTG)
         self.units = units
 
+    @classmethod
+    def FromRow(cls,name,desc,device,units,ID,DTG):
+        """Create a sensor from a row already validated by the DB"""
+        obj = super().FromRow(name,desc,device,ID,DTG)
+        obj.units = units
+        return obj
+
 class Record(object):
     """Model for a data point in the records table"""
+    __slots__ = ('data','error','sensor','ID','DTG')
+
     def __init__(self,data,error,sensor,ID=None,DTG=None):
         """Create a Record object
         Parameters:
@@ -904,51 +1837,275 @@ class Record(object):
         self.ID = ID
         self.DTG = DTG
 
+    @classmethod
+    def FromArrays(cls,data,error,sensor,IDs=None,DTGs=None):
+        """Build a RecordSet straight from columns of values, validating the
+        sensor once rather than creating a Record for each entry
+        Parameters:
+            data - double array, values of the records
+            error - double array, uncertainties of the records
+            sensor - Sensor, sensor that took the measurements
+            IDs - int array, internal DB identifiers, optional
+            DTGs - datetime array, times the records were entered, optional"""
+        # Argument validation
+        if not sensor:
+            raise ModelException('Records must belong to a valid sensor')
+
+        data = np.asarray(data,dtype=np.float64)
+        if data.ndim != 1 or not len(data):
+            raise ModelException('A record set requires at least one value')
+
+        array = np.empty(len(data),dtype=RecordSet.dtype)
+        try:
+            array['data'] = data
+            array['error'] = error
+            array['id'] = -1 if IDs is None else IDs
+            array['dtg'] = np.datetime64('NaT') if DTGs is None else DTGs
+        except ValueError:
+            raise ModelException('Record columns must all be the same length')
+
+        rs = RecordSet.__new__(RecordSet)
+        rs._SetArray(array,sensor)
+        return rs
+
 class RecordSet(object):
     """Holds multiple records"""
+    __slots__ = ('array','data','error','IDs','times','sensor','N',
+                 '_meanM2','_timeRange')
+
+    # Layout of one record in the set's array, IDs of -1 were never stored
+    dtype = np.dtype([('data','f8'),('error','f8'),('id','i8'),('dtg','datetime64[us]')])
+
+    # Number of values whose deviations are held at once by the statistics
+    blockSize = 1<<16
+
+    # Same layout with the timestamp as integer microseconds since the epoch
+    epochDtype = np.dtype([('data','f8'),('error','f8'),('id','i8'),('dtg','i8')])
 
     def __init__(self,records):
         """Build  set of records
         Parameters:
             records - Record array, data points"""
-        self.times = [r.DTG for r in records]
-        self.data = [r.data for r in records]
-        self.error = [r.error for r in records]
-        self.sensor = records[0].sensor
-        self.N = len(self.times)
+        # Fill the array in a single pass over the records, without building
+        # an intermediate list of rows
+        rows = ((r.data,r.error,-1 if r.ID is None else r.ID,r.DTG) for r in records)
+        self._SetArray(np.fromiter(rows,dtype=self.dtype,count=len(records)),records[0].sensor)
+
+    @classmethod
+    def FromRows(cls,rows,sensor,epoch=False):
+        """Build a set of records straight from DB rows, without creating a
+        Record object for each one
+        Parameters:
+            rows - list or tuple of (data,error,ID,DTG) rows
+            sensor - Sensor, sensor that took the measurements
+            epoch - bool, DTGs are given as microseconds since the epoch"""
+        # np.fromiter takes rows from a list or a tuple alike, whereas np.array
+        # reads a tuple of tuples as a single structured record
+        rs = cls.__new__(cls)
+        if epoch:
+            # The integers are reinterpreted in place as datetime64[us]
+            array = np.fromiter(rows,dtype=cls.epochDtype,count=len(rows)).view(cls.dtype)
+        else:
+            array = np.fromiter(rows,dtype=cls.dtype,count=len(rows))
+        rs._SetArray(array,sensor)
+        return rs
+
+    @classmethod
+    def FromCursor(cls,cursor,sensor,chunkSize=100000):
+        """Build a set of records from an executed query, converting its rows
+        column-wise one chunk at a time so that the full result never exists
+        as Python tuples
+        Parameters:
+            cursor - cursor that has executed a query for (data,error,ID,DTG)
+                     rows, with DTGs as microseconds since the epoch
+            sensor - Sensor, sensor that took the measurements
+            chunkSize - int, number of rows pulled from the server at a time"""
+        chunks = []
+        rows = cursor.fetchmany(chunkSize)
+        while rows:
+            chunks.append(np.fromiter(rows,dtype=cls.epochDtype,count=len(rows)))
+            rows = cursor.fetchmany(chunkSize)
+
+        array = np.concatenate(chunks) if chunks else np.empty(0,dtype=cls.epochDtype)
+
+        rs = cls.__new__(cls)
+        rs._SetArray(array.view(cls.dtype),sensor)
+        return rs
+
+    def _SetArray(self,array,sensor):
+        """Hold the records as one structured array, exposing each field as a
+        column view into it"""
+        self.array = array
+        self.data = array['data']
+        self.error = array['error']
+        self.IDs = array['id']
+        self.times = array['dtg']
+        self.sensor = sensor
+        self.N = len(array)
+        self._meanM2 = None
+        self._timeRange = None
+
+    def GetRecord(self,i):
+        """Obtain a single entry of the set as a Record object
+        Parameters:
+            i - int, index of the record"""
+        row = self.array[i]
+        ID = int(row['id'])
+        return Record(float(row['data']),float(row['error']),self.sensor,
+                      None if ID < 0 else ID,row['dtg'].item())
+
+    def __len__(self):
+        return self.N
+
+    def __getitem__(self,i):
+        # Records are only created when an entry is asked for
+        return self.GetRecord(i)
+
+    @property
+    def UnitsLabel(self):
+        """The units label for the data points"""
+        return self.sensor.units.label
 
     def GetUnitsLabel(self):
         """Obtain the units label for the data points"""
-        units = self.sensor.units
-        return units.desc + ' (' + units.short + ')'
+        return self.UnitsLabel
     
+    def TimeRange(self):
+        """The first and last times in the set, found with one reduction each
+        the first time they are asked for.  Records without a DTG are left out."""
+        if self._timeRange is None:
+            times = self.times[~np.isnat(self.times)]
+            if not len(times):
+                raise ModelException('Record set has no timestamped records')
+            self._timeRange = (times.min().item(),times.max().item())
+        return self._timeRange
+
     def GetPlotLabel(self):
         """Returns a formatted plot title"""
-        units = self.sensor.units
-        title = units.desc + ' Measured by ' + self.sensor.Nomenclature() + '\nfrom ' + str(min(self.times)) + ' until ' + str(max(self.times)) + '\n'
-        return title
+        tmin,tmax = self.TimeRange()
+        return f'{self.sensor.units.desc} Measured by {self.sensor.Nomenclature()}\nfrom {tmin} until {tmax}\n'
     
-    def WriteCSV(self,fileName,delim=',',header=False):
-        """Write a CSV file of the data"""
-        fp = open(fileName,'w')
-        
-        if header:
-            fp.write(delim.join(['DTG',self.GetUnitsLabel(),'Error'])+'\n')
-            
-        for t,y,dy in zip(self.times,self.data,self.error):
-            fp.write(delim.join([str(t),str(y),str(dy)])+'\n')
-            
-        fp.close()
+    def WriteCSV(self,fileName,delim=',',header=False,bufSize=1<<20):
+        """Write a CSV file of the data
+        Parameters:
+            fileName - string, path of the file to write
+            delim - string, column delimiter
+            header - bool, write a row of column names first
+            bufSize - int, bytes buffered between writes to the file"""
+        with open(fileName,'w',buffering=bufSize,newline='') as fp:
+            writer = csv.writer(fp,delimiter=delim,lineterminator='\n')
+
+            if header:
+                writer.writerow(['DTG',self.UnitsLabel,'Error'])
+
+            # Format each column in bulk rather than value by value, a block of
+            # rows at a time so memory stays bounded however large the set.
+            # The timestamps are formatted by NumPy, with the ISO 'T' swapped
+            # for a space in place, and the values as the reprs of Python floats.
+            for i in range(0,self.N,self.blockSize):
+                block = self.times[i:i+self.blockSize]
+                times = np.datetime_as_string(block,unit='us')
+                times.view(np.uint32).reshape(len(block),-1)[~np.isnat(block),10] = ord(' ')
+                rows = zip(times.tolist(),
+                           map(repr,self.data[i:i+self.blockSize].tolist()),
+                           map(repr,self.error[i:i+self.blockSize].tolist()))
+                fp.write('\n'.join(map(delim.join,rows)) + '\n')
+
+    def _ArrowTable(self):
+        """Build an Arrow table of the data with the same columns as WriteCSV.
+        The columns are handed over from the set's arrays without formatting."""
+        if pa is None:
+            print('pyarrow is required to write Parquet or Feather files')
+            raise ModelException('pyarrow not installed')
+
+        return pa.table({'DTG' : pa.array(self.times,type=pa.timestamp('us')),
+                         self.UnitsLabel : pa.array(self.data,type=pa.float64()),
+                         'Error' : pa.array(self.error,type=pa.float64())})
+
+    def WriteParquet(self,fileName,compression='snappy'):
+        """Write a Parquet file of the data.  Much faster to write and to load
+        back than CSV, and the recommended format for analysis.
+        Parameters:
+            fileName - string, path of the file to write
+            compression - string, codec used on the columns"""
+        # The table is built first, so that a missing pyarrow is reported
+        # before pa.parquet is looked up
+        table = self._ArrowTable()
+        pa.parquet.write_table(table,fileName,compression=compression)
+
+    def WriteFeather(self,fileName,compression='zstd'):
+        """Write a Feather file of the data
+        Parameters:
+            fileName - string, path of the file to write
+            compression - string, codec used on the columns"""
+        table = self._ArrowTable()
+        pa.feather.write_feather(table,fileName,compression=compression)
         
+    def _MeanM2(self):
+        """The mean and the sum of squared deviations from it, computed once
+        and shared by all of the statistics.  The deviations are taken from
+        the mean rather than accumulating sums of squares, which would lose
+        precision on nearly constant data."""
+        if self._meanM2 is None:
+            if not self.N:
+                raise ModelException('Statistics require at least one record')
+            # The deviations are summed a block at a time by a generator, so
+            # no temporary the size of the whole set is allocated
+            mean = self.data.mean()
+            blocks = (self.data[i:i+self.blockSize] - mean for i in range(0,self.N,self.blockSize))
+            m2 = sum(np.dot(dev,dev) for dev in blocks)
+            self._meanM2 = (float(mean),float(m2))
+        return self._meanM2
+
     def Mean(self):
         """The average value of this measurement set"""
-        return sum(self.data)/self.N
+        return self._MeanM2()[0]
     
     def Variance(self):
         """The variance of the measurements"""
-        xbar = self.Mean()
-        return sum([(x-xbar)**2 for x in self.data])/self.N
+        return self._MeanM2()[1]/self.N
     
     def StandardDeviation(self):
         """The standard deviation of the measurements"""
-        return (self.Variance()*self.N/(self.N-1))**(0.5)
+        return (self._MeanM2()[1]/(self.N-1))**(0.5)
+
+def _WriteMany(write,sets,paths,maxWorkers,kwargs):
+    """Write several record sets, one file each, from a pool of threads
+    Parameters:
+        write - RecordSet method that writes one file
+        sets - RecordSet array, sets to write
+        paths - string array, file to write each set to
+        maxWorkers - int, number of files written at once
+        kwargs - options passed on to every write"""
+    sets = list(sets)
+    paths = list(paths)
+    if len(sets) != len(paths):
+        raise ModelException('Every record set requires a file name')
+
+    # Only work that releases the GIL overlaps across threads: the file
+    # writes, and nearly all of a Parquet write, which happens inside Arrow.
+    # CSV formatting (repr, str.join, datetime_as_string) holds the GIL.
+    # Exceptions from any write are re-raised here.
+    with ThreadPoolExecutor(max_workers=maxWorkers) as ex:
+        list(ex.map(lambda rs,path: write(rs,path,**kwargs),sets,paths))
+
+def WriteCSVMany(sets,paths,maxWorkers=8,**kwargs):
+    """Write a CSV file for each of several record sets concurrently.  The
+    formatting holds the GIL, so only the file writes overlap and the gain
+    over a plain loop is small; WriteParquetMany overlaps far better.
+    Parameters:
+        sets - RecordSet array, sets to write
+        paths - string array, file to write each set to
+        maxWorkers - int, number of files written at once
+        kwargs - options passed on to RecordSet.WriteCSV"""
+    _WriteMany(RecordSet.WriteCSV,sets,paths,maxWorkers,kwargs)
+
+def WriteParquetMany(sets,paths,maxWorkers=8,**kwargs):
+    """Write a Parquet file for each of several record sets concurrently.
+    Arrow does the work with the GIL released, so the files overlap well.
+    Parameters:
+        sets - RecordSet array, sets to write
+        paths - string array, file to write each set to
+        maxWorkers - int, number of files written at once
+        kwargs - options passed on to RecordSet.WriteParquet"""
+    _WriteMany(RecordSet.WriteParquet,sets,paths,maxWorkers,kwargs)
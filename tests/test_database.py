@@ -0,0 +1,96 @@
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('mysql.connector')
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),os.pardir))
+import SpinlabSC
+
+
+class FakeCnx(object):
+    def __init__(self,session):
+        self.connection_id = session
+
+    def cursor(self,prepared=False):
+        return object()
+
+
+class FakePooled(object):
+    """Stands in for the wrapper the pool hands out on each borrow"""
+    def __init__(self,cnx):
+        self._cnx = cnx
+
+    def __getattr__(self,attr):
+        return getattr(self._cnx,attr)
+
+
+@pytest.fixture
+def db():
+    db = SpinlabSC.Database.__new__(SpinlabSC.Database)
+    db._stmtCache = {}
+    db._stmtLock = threading.Lock()
+    return db
+
+
+def test_statement_cache_keeps_connections_apart(db):
+    a,b = FakeCnx(5),FakeCnx(6)
+    cursor = db._Statement(FakePooled(b),'SELECT 1')
+    assert db._Statement(FakePooled(b),'SELECT 1') is cursor
+
+    # A reconnects and is given the session ID B had before a server restart
+    b.connection_id = 1
+    a.connection_id = 6
+    assert db._Statement(FakePooled(a),'SELECT 1') is not cursor
+    assert db._Statement(FakePooled(b),'SELECT 1') is not cursor
+
+
+def test_statement_cache_keys_on_prepared(db):
+    conn = FakePooled(FakeCnx(5))
+    assert db._Statement(conn,'SELECT 1') is not db._Statement(conn,'SELECT 1',prepared=False)
+
+
+def test_run_async_leaves_policy_alone():
+    import asyncio
+    policy = asyncio.get_event_loop_policy()
+
+    async def Answer():
+        return 42
+
+    assert SpinlabSC.RunAsync(Answer()) == 42
+    assert asyncio.get_event_loop_policy() is policy
+
+
+@pytest.mark.parametrize('attrs',[('new_event_loop',),('new_event_loop','run')])
+def test_run_async_uses_uvloop_without_runner(monkeypatch,attrs):
+    # Stands in for uvloop on a Python without asyncio.Runner
+    import asyncio
+    loops = []
+
+    class FakeUvloop(object):
+        @staticmethod
+        def new_event_loop():
+            loops.append(asyncio.new_event_loop())
+            return loops[-1]
+
+        @staticmethod
+        def run(coro):
+            loop = FakeUvloop.new_event_loop()
+            try:
+                return loop.run_until_complete(coro)
+            finally:
+                loop.close()
+
+    if 'run' not in attrs:
+        del FakeUvloop.run
+    monkeypatch.setattr(SpinlabSC,'uvloop',FakeUvloop)
+    monkeypatch.delattr(asyncio,'Runner',raising=False)
+
+    async def Answer():
+        return 42
+
+    assert SpinlabSC.RunAsync(Answer()) == 42
+    assert len(loops) == 1 and loops[0].is_closed()
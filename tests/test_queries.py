@@ -0,0 +1,131 @@
+import contextlib
+import datetime
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mysql.connector')
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),os.pardir))
+import SpinlabSC
+
+
+def test_select_params_convert_numpy_scalars():
+    times = np.array(['2020-01-01T00:00:00','2020-01-02T00:00:00.5'],dtype='datetime64[ns]')
+    query,params = SpinlabSC._SelectQuery('Records',['recID'],None,
+                                          {'senID':SpinlabSC.EQ(np.int64(3)),
+                                           'recDTG':SpinlabSC.InRange(times[0],times[1])})
+
+    assert params == (3,datetime.datetime(2020,1,1),datetime.datetime(2020,1,2,0,0,0,500000))
+    assert [type(p) for p in params] == [int,datetime.datetime,datetime.datetime]
+
+
+def test_insert_params_convert_numpy_scalars():
+    query,params = SpinlabSC._InsertQuery('Records',{'recData':np.float64(1.5),'senID':np.int64(2)})
+
+    assert query == 'INSERT INTO Records ( recData,senID ) VALUES ( %s,%s )'
+    assert params == (1.5,2)
+    assert [type(p) for p in params] == [float,int]
+
+
+def test_in_rejects_empty_list():
+    with pytest.raises(SpinlabSC.DatabaseException):
+        SpinlabSC.In([])
+
+
+def test_in_pads_to_power_of_two():
+    query,params = SpinlabSC._SelectQuery('Owners',['ownerName'],None,
+                                          {'ownerID':SpinlabSC.In([4,5,6])})
+
+    assert query == 'SELECT ownerName FROM Owners WHERE ownerID IN (%s,%s,%s,%s)'
+    assert params == (4,5,6,6)
+
+    query,params = SpinlabSC._SelectQuery('Owners',['ownerName'],None,
+                                          {'ownerID':SpinlabSC.In([4])})
+    assert query == 'SELECT ownerName FROM Owners WHERE ownerID IN (%s)'
+    assert params == (4,)
+
+
+def test_path_sql():
+    assert SpinlabSC._PathSQL(3) == (
+        'SELECT o.ownerName,o.ownerDesc,o.ownerID,o.ownerDTG,'
+        'p.projName,p.projDesc,p.projID,p.projDTG,'
+        's.sysName,s.sysDesc,s.sysID,s.sysDTG '
+        'FROM Owners o JOIN Projects p ON p.ownerID = o.ownerID '
+        'JOIN Systems s ON s.projID = p.projID '
+        'WHERE o.ownerName = %s AND p.projName = %s AND s.sysName = %s')
+
+
+def test_latest_sql():
+    assert SpinlabSC._LatestSQL('Records',2) == (
+        'SELECT r.senID,r.recData,r.recError,r.recDTG,r.recID FROM Records r '
+        'JOIN (SELECT t.senID,MAX(t.recID) AS latestID FROM Records t '
+        'JOIN (SELECT senID,MAX(recDTG) AS latest FROM Records '
+        'WHERE senID IN (%s,%s) GROUP BY senID) x '
+        'ON t.senID = x.senID AND t.recDTG = x.latest GROUP BY t.senID) y '
+        'ON r.recID = y.latestID')
+
+
+class FakeCursor(object):
+    """Answers a query with rows whose columns are laid out in the order the
+    query selects them, so the values land wherever the SQL puts them"""
+    def __init__(self,rows):
+        self.rows = rows
+
+    def execute(self,query,params):
+        columns = query[len('SELECT '):query.index(' FROM ')].split(',')
+        self.result = [tuple(row[col.split('.')[-1]] for col in columns) for row in self.rows]
+
+    def fetchall(self):
+        return self.result
+
+
+def FakeDatabase(rows):
+    db = SpinlabSC.Database.__new__(SpinlabSC.Database)
+    db.devmode = False
+    db.recTable = 'Records'
+    db._idCache = {table:{} for table in ('Owners','Projects','Systems',
+                                         'Manufacturers','Devices','Units')}
+    db._nameCache = {table:{} for table in db.refTables}
+    cursor = FakeCursor(rows)
+
+    @contextlib.contextmanager
+    def Connection():
+        yield None
+
+    db._Connection = Connection
+    db._Statement = lambda conn,query: cursor
+    return db
+
+
+def test_resolve_path_maps_columns():
+    DTG = datetime.datetime(2020,1,1)
+    mfg = object()
+    db = FakeDatabase([{'ownerName':'own','ownerDesc':'owner','ownerID':1,'ownerDTG':DTG,
+                        'projName':'proj','projDesc':'project','projID':2,'projDTG':DTG,
+                        'sysName':'sys','sysDesc':'system','sysID':3,'sysDTG':DTG,
+                        'devName':'dev','devDesc':'device','devURL':'http://doc',
+                        'mfgID':4,'devID':5,'devDTG':DTG}])
+    db.GetManufacturer = lambda ID: mfg if ID == 4 else None
+
+    dev = db._ResolvePath(['own','proj','sys','dev'])
+
+    assert (dev.name,dev.desc,dev.URL,dev.mfg,dev.ID,dev.DTG) == ('dev','device','http://doc',mfg,5,DTG)
+    assert dev.Nomenclature() == 'own.proj.sys.dev'
+    assert [dev.parent.ID,dev.parent.parent.ID,dev.parent.parent.parent.ID] == [3,2,1]
+    assert dev.parent.parent.parent.desc == 'owner'
+
+
+def test_most_recent_records_maps_columns():
+    units = SpinlabSC.Units('K','kelvin','temperature')
+    a = SpinlabSC.Sensor.FromRow('a','sensor',None,units,1,None)
+    b = SpinlabSC.Sensor.FromRow('b','sensor',None,units,2,None)
+    DTG = datetime.datetime(2020,1,1)
+    db = FakeDatabase([{'senID':2,'recData':1.5,'recError':0.1,'recDTG':DTG,'recID':9}])
+
+    missing,rec = db.GetMostRecentRecords([a,b])
+
+    assert missing is None
+    assert (rec.data,rec.error,rec.sensor,rec.ID,rec.DTG) == (1.5,0.1,b,9,DTG)
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mysql.connector')
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),os.pardir))
+import SpinlabSC
+
+
+@pytest.fixture
+def sensor():
+    units = SpinlabSC.Units('K','kelvin','temperature')
+    return SpinlabSC.Sensor.FromRow('sen','sensor',None,units,1,None)
+
+
+def test_from_rows_accepts_tuple_of_rows(sensor):
+    # aiomysql hands back fetchall() results as a tuple of tuples
+    rows = ((1.5,0.1,7,1577836800000000),(2.5,0.2,8,1577836801000000))
+    rs = SpinlabSC.RecordSet.FromRows(rows,sensor,epoch=True)
+
+    assert rs.N == 2
+    assert rs.data.tolist() == [1.5,2.5]
+    assert rs.IDs.tolist() == [7,8]
+    assert str(rs.times[1]) == '2020-01-01T00:00:01.000000'
+
+
+@pytest.mark.parametrize('method',['WriteParquet','WriteFeather'])
+def test_arrow_writers_without_pyarrow(sensor,monkeypatch,tmp_path,method):
+    monkeypatch.setattr(SpinlabSC,'pa',None)
+    rs = SpinlabSC.Record.FromArrays([1.0],[0.1],sensor)
+
+    with pytest.raises(SpinlabSC.ModelException):
+        getattr(rs,method)(str(tmp_path / 'out'))
+
+
+def test_from_arrays_rejects_empty(sensor):
+    with pytest.raises(SpinlabSC.ModelException):
+        SpinlabSC.Record.FromArrays([],[],sensor)
+
+
+def test_empty_set_statistics_raise(sensor):
+    rs = SpinlabSC.RecordSet.FromRows([],sensor,epoch=True)
+
+    with pytest.raises(SpinlabSC.ModelException):
+        rs.Variance()
+    with pytest.raises(SpinlabSC.ModelException):
+        rs.TimeRange()
+
+
+def test_time_range_skips_missing_dtgs(sensor):
+    DTGs = np.array(['NaT','2020-01-02','2020-01-01'],dtype='datetime64[us]')
+    rs = SpinlabSC.Record.FromArrays([1.0,2.0,3.0],0.1,sensor,DTGs=DTGs)
+    assert [str(t) for t in rs.TimeRange()] == ['2020-01-01 00:00:00','2020-01-02 00:00:00']
+
+    rs = SpinlabSC.Record.FromArrays([1.0],[0.1],sensor)
+    with pytest.raises(SpinlabSC.ModelException):
+        rs.GetPlotLabel()
+
+
+def test_write_csv_spans_blocks(sensor,monkeypatch,tmp_path):
+    monkeypatch.setattr(SpinlabSC.RecordSet,'blockSize',2)
+    DTGs = np.array(['2020-01-01T00:00:01','NaT','2020-01-01T00:00:02.5'],dtype='datetime64[us]')
+    rs = SpinlabSC.Record.FromArrays([0.1+0.2,2.0,3.0],[1e-20,0.1,0.2],sensor,DTGs=DTGs)
+
+    path = tmp_path / 'out.csv'
+    rs.WriteCSV(str(path),header=True)
+
+    assert path.read_text().splitlines() == ['DTG,temperature (K),Error',
+                                             '2020-01-01 00:00:01.000000,0.30000000000000004,1e-20',
+                                             'NaT,2.0,0.1',
+                                             '2020-01-01 00:00:02.500000,3.0,0.2']